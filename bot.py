@@ -3,8 +3,16 @@ import a2s
 import json
 import asyncio
 import time
+import re
+import heapq
+import bisect
+import socket
+import struct
+import hashlib
+import contextlib
 from discord import app_commands
 from discord.ui import View, Button, Select
+from discord.ext import tasks
 import os
 from dotenv import load_dotenv
 import aiohttp # Para a API da Faceit
@@ -14,9 +22,11 @@ from datetime import datetime # Para a API da Faceit
 load_dotenv() # Carrega as variáveis do ficheiro .env
 TOKEN = os.getenv("DISCORD_TOKEN") # Lê o token seguro
 SERVERS_FILE = "servers.json"
+OWNER_EMOJIS = {"TUGA ARMY": "🛡️", "SweetRicers": "🍬", "CyberShoke": "⚡"} # Donos conhecidos (OwnerSelect e /servidor)
 
 # --- Configuração da API Faceit (DEFINIÇÃO GLOBAL) ---
 FACEIT_API_KEY = os.getenv("FACEIT_API_KEY")
+FACEIT_API_BASE = os.getenv("FACEIT_API_BASE", "https://open.faceit.com/data/v4") # Pode ser trocado (ex: loadtest.py)
 FACEIT_HEADERS = {
     'Authorization': f'Bearer {FACEIT_API_KEY}',
     'accept': 'application/json'
@@ -28,18 +38,120 @@ FACEIT_HEADERS = {
 SOUND_FILE_ADORO_TE = "adorote.mp3" 
 # -------------------------------
 
+# --- Configuração HTTP (sessão partilhada) ---
+HTTP_LIMIT = 100          # Ligações no total
+HTTP_LIMIT_PER_HOST = 32  # Ligações por host (ex: open.faceit.com)
+HTTP_KEEPALIVE = 60       # Segundos que uma ligação (TLS já feito) fica aberta à espera de reutilização
+HTTP_DNS_TTL = 300        # Segundos de cache de DNS
+# Timeouts por tipo de pedido, criados uma vez (e não a cada chamada)
+HTTP_TIMEOUTS = {
+    "faceit_player": aiohttp.ClientTimeout(total=10, connect=3, sock_read=5),
+    "faceit_stats": aiohttp.ClientTimeout(total=10, connect=3, sock_read=8), # stats, histórico e partidas (respostas maiores)
+}
+
+class HttpPool:
+    """Dona da sessão aiohttp: cria-a no arranque, fecha-a quando o client fecha
+    e conta ligações novas/reutilizadas e tempo na fila à espera de ligação."""
+
+    def __init__(self):
+        self.session = None
+        self.active = 0 # Ligações do connector em uso (da aquisição até o pedido a libertar)
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.queued = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    async def start(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_connection_queued_start.append(self._on_queued_start)
+        trace.on_connection_queued_end.append(self._on_queued_end)
+        trace.on_connection_create_end.append(self._on_connection_create)
+        trace.on_connection_reuseconn.append(self._on_connection_reuse)
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_LIMIT, limit_per_host=HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE, ttl_dns_cache=HTTP_DNS_TTL,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, trace_configs=[trace])
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            print(f"Sessão aiohttp fechada. {self.stats()}")
+            await self.session.close()
+
+    @contextlib.asynccontextmanager
+    async def get(self, url, endpoint, **kwargs):
+        # held conta as ligações que este pedido adquiriu (via trace); ao sair do
+        # 'async with' a resposta é libertada e a ligação volta ao pool
+        held = {"connections": 0}
+        try:
+            async with self.session.get(url, timeout=HTTP_TIMEOUTS[endpoint], trace_request_ctx=held, **kwargs) as resp:
+                yield resp
+        finally:
+            self.active -= held["connections"]
+
+    def stats(self):
+        connections = self.new_connections + self.reused_connections
+        return {
+            "active": self.active,
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_ratio": self.reused_connections / connections if connections else 0.0,
+            "queued": self.queued,
+            "queue_wait_avg_ms": self.queue_wait_total / self.queued * 1000 if self.queued else 0.0,
+            "queue_wait_max_ms": self.queue_wait_max * 1000,
+        }
+
+    # --- Callbacks do TraceConfig ---
+    async def _on_request_start(self, session, ctx, params):
+        self.requests += 1
+
+    async def _on_queued_start(self, session, ctx, params):
+        ctx.queued_at = time.perf_counter()
+
+    async def _on_queued_end(self, session, ctx, params):
+        wait = time.perf_counter() - ctx.queued_at
+        self.queued += 1
+        self.queue_wait_total += wait
+        self.queue_wait_max = max(self.queue_wait_max, wait)
+
+    def _acquired(self, ctx):
+        if ctx.trace_request_ctx is not None: # Só pedidos feitos por get() são libertados por ele
+            ctx.trace_request_ctx["connections"] += 1
+            self.active += 1
+
+    async def _on_connection_create(self, session, ctx, params):
+        self.new_connections += 1
+        self._acquired(ctx)
+
+    async def _on_connection_reuse(self, session, ctx, params):
+        self.reused_connections += 1
+        self._acquired(ctx)
+
+http_pool = HttpPool()
+
 # --- CLIENT ---
+class BotClient(discord.Client):
+    async def close(self):
+        await http_pool.close() # Fecha a sessão HTTP antes de desligar do Discord
+        await super().close()
+
 intents = discord.Intents.default()
 intents.voice_states = True # <-- NOVO: Permissão para ver estados de voz
-client = discord.Client(intents=intents)
+client = BotClient(intents=intents)
 tree = app_commands.CommandTree(client)
 
 # --- Setup Hook para criar a sessão ---
 @client.event
 async def setup_hook():
-    """Cria uma sessão aiohttp persistente quando o bot arranca."""
-    client.http_session = aiohttp.ClientSession()
+    """Cria a sessão aiohttp partilhada quando o bot arranca."""
+    await http_pool.start()
     print("Sessão aiohttp criada.")
+    load_status_boards()
+    status_board_loop.start()
 # --- Fim do Setup Hook ---
 
 
@@ -49,10 +161,19 @@ async def setup_hook():
 # ===================================================================
 
 # --- FUNÇÃO: Ler lista de servidores ---
+# Cache (mtime_ns, tamanho) -> lista, para não re-ler milhares de entradas a cada comando
+_server_list_cache = {"stamp": None, "servers": []}
+
 def get_server_list():
     try:
+        stat = os.stat(SERVERS_FILE)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == _server_list_cache["stamp"]:
+            return _server_list_cache["servers"]
         with open(SERVERS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            servers = json.load(f)
+        _server_list_cache.update(stamp=stamp, servers=servers)
+        return servers
     except FileNotFoundError:
         print(f"❌ ERRO: Arquivo {SERVERS_FILE} não encontrado.")
         return []
@@ -60,13 +181,202 @@ def get_server_list():
         print(f"⚠️ ERRO: Arquivo {SERVERS_FILE} mal formatado.")
         return []
 
-# --- FUNÇÃO: Consultar um único servidor ---
+# --- FUNÇÃO: Gravar lista de servidores (escrita atómica) ---
+def save_server_list(servers):
+    tmp_file = f"{SERVERS_FILE}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(servers, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, SERVERS_FILE)
+    stat = os.stat(SERVERS_FILE)
+    _server_list_cache.update(stamp=(stat.st_mtime_ns, stat.st_size), servers=servers)
+
+# --- ÍNDICE: Pesquisa de servidores por nome, dono e mapa (/servidor) ---
+def tokenize(text):
+    """Parte um texto em tokens (ex: 'de_mirage' -> ['de', 'mirage']). Aceita qualquer alfabeto
+    (cirílico, CJK...); o '_' separa palavras como nos nomes dos mapas."""
+    return re.findall(r"[^\W_]+", text.casefold())
+
+def server_key(server):
+    return f"{server['ip']}:{server['porta']}"
+
+def server_owner(server):
+    """Devolve o dono do servidor (da lista do OwnerSelect) se aparecer no nome."""
+    name_lower = server["nome"].lower()
+    for owner in OWNER_EMOJIS:
+        if owner.lower() in name_lower:
+            return owner
+    return None
+
+class ServerSearchIndex:
+    """Índice em memória: cada prefixo de cada token aponta para as chaves 'ip:porta'.
+    Uma pesquisa é só uma interseção de sets, sem percorrer a lista toda."""
+
+    def __init__(self):
+        self.servers = {}  # chave -> servidor (do servers.json)
+        self.maps = {}     # chave -> último mapa visto pelo A2S
+        self.tokens = {}   # chave -> tokens indexados dessa chave
+        self.prefixes = {} # prefixo -> set de chaves
+        self.ordered = []  # (nome, chave) sempre ordenado, mantido com bisect
+        self.source = None  # última lista sincronizada (ver refresh_server_index)
+
+    def _entry_tokens(self, key):
+        server = self.servers[key]
+        text = f"{server['nome']} {server.get('tipo', '')} {server_owner(server) or ''} {self.maps.get(key, '')}"
+        return set(tokenize(text))
+
+    def _reindex(self, key):
+        old_tokens = self.tokens.pop(key, set())
+        new_tokens = self._entry_tokens(key) if key in self.servers else set()
+        for token in old_tokens - new_tokens:
+            for i in range(1, len(token) + 1):
+                keys = self.prefixes.get(token[:i])
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.prefixes[token[:i]]
+        for token in new_tokens - old_tokens:
+            for i in range(1, len(token) + 1):
+                self.prefixes.setdefault(token[:i], set()).add(key)
+        if new_tokens:
+            self.tokens[key] = new_tokens
+
+    def upsert(self, server):
+        key = server_key(server)
+        old = self.servers.get(key)
+        if old != server:
+            if old is not None:
+                self._unorder(key, old)
+            self.servers[key] = server
+            bisect.insort(self.ordered, (server["nome"].casefold(), key))
+            self._reindex(key)
+
+    def remove(self, key):
+        server = self.servers.pop(key, None)
+        if server is not None:
+            self.maps.pop(key, None)
+            self._unorder(key, server)
+            self._reindex(key)
+
+    def _unorder(self, key, server):
+        entry = (server["nome"].casefold(), key)
+        i = bisect.bisect_left(self.ordered, entry)
+        if i < len(self.ordered) and self.ordered[i] == entry:
+            del self.ordered[i]
+
+    def update_map(self, server, map_name):
+        """Chamado depois de cada consulta A2S; só reindexa se o mapa mudou."""
+        key = server_key(server)
+        if key in self.servers and self.maps.get(key) != map_name:
+            self.maps[key] = map_name
+            self._reindex(key)
+
+    def sync(self, server_list):
+        """Aplica as diferenças de uma nova lista de servidores (só mexe no que mudou)."""
+        new_keys = set()
+        for server in server_list:
+            new_keys.add(server_key(server))
+            self.upsert(server)
+        for key in set(self.servers) - new_keys:
+            self.remove(key)
+
+    def search(self, query, limit=25):
+        """Devolve até `limit` chaves cujos tokens começam por todos os termos da pesquisa."""
+        terms = tokenize(query)
+        if not terms:
+            # Pesquisa vazia mostra os primeiros; texto sem letras/números (ex: '!!!') não encontra nada
+            return [key for _, key in self.ordered[:limit]] if not query.strip() else []
+        sets = []
+        for term in terms:
+            keys = self.prefixes.get(term)
+            if not keys:
+                return []
+            sets.append(keys)
+        sets.sort(key=len)
+        matches = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+        if len(matches) * 8 > len(self.ordered):
+            # Muitos resultados: basta percorrer a ordem pré-calculada até encher
+            result = []
+            for _, key in self.ordered:
+                if key in matches:
+                    result.append(key)
+                    if len(result) == limit:
+                        break
+            return result
+        return heapq.nsmallest(limit, matches, key=lambda k: self.servers[k]["nome"].casefold())
+
+server_index = ServerSearchIndex()
+
+def refresh_server_index():
+    """Sincroniza o índice só quando a lista de servidores mudou (mesma lista em cache = nada a fazer)."""
+    server_list = get_server_list()
+    if server_list is not server_index.source:
+        server_index.source = server_list
+        server_index.sync(server_list)
+
+# --- Limite de consultas A2S em simultâneo (com milhares de servidores não abrimos milhares de sockets) ---
+A2S_MAX_CONCURRENCY = 256
+a2s_semaphore = asyncio.Semaphore(A2S_MAX_CONCURRENCY)
+
+# --- Cache A2S: vários utilizadores a ver os mesmos servidores partilham a mesma consulta ---
+A2S_CACHE_TTL = 10 # segundos
+_a2s_cache = {}    # chave -> (instante, resultado)
+_a2s_inflight = {} # chave -> task da consulta a decorrer
+
+def cached_server_info(server):
+    """Resultado ainda fresco em cache, ou None. Síncrono: não cria tasks."""
+    cached = _a2s_cache.get(server_key(server))
+    if cached and time.monotonic() - cached[0] < A2S_CACHE_TTL:
+        return cached[1]
+    return None
+
+def start_server_query(server):
+    """Devolve (task, nova): a consulta em curso deste servidor ou uma nova."""
+    key = server_key(server)
+    task = _a2s_inflight.get(key)
+    if task is not None:
+        return task, False
+    task = asyncio.ensure_future(query_server_info(server))
+    _a2s_inflight[key] = task
+
+    def on_done(t):
+        _a2s_inflight.pop(key, None)
+        if not t.cancelled():
+            _a2s_cache[key] = (time.monotonic(), t.result())
+    task.add_done_callback(on_done)
+    return task, True
+
+# --- FUNÇÃO: Consultar um único servidor (com cache) ---
 async def fetch_server_info(server):
+    result = cached_server_info(server)
+    if result is None:
+        task, _ = start_server_query(server)
+        # shield: se um utilizador cancelar, a consulta continua para os outros
+        result = await asyncio.shield(task)
+    return result
+
+# --- FUNÇÃO: Consultar vários servidores (cache + no máximo A2S_MAX_CONCURRENCY consultas de cada vez) ---
+async def fetch_server_infos(servers):
+    results = [cached_server_info(s) for s in servers]
+    missing = iter([i for i, r in enumerate(results) if r is None])
+
+    async def worker():
+        for i in missing:
+            task, new = start_server_query(servers[i])
+            results[i] = await (task if new else asyncio.shield(task))
+
+    await asyncio.gather(*(worker() for _ in range(min(A2S_MAX_CONCURRENCY, len(servers)))))
+    return results
+
+# --- FUNÇÃO: Consulta A2S propriamente dita ---
+async def query_server_info(server):
     address = (server["ip"], server["porta"])
     try:
-        start = time.perf_counter()
-        info = await asyncio.wait_for(a2s.ainfo(address), timeout=2.5)
-        ping = (time.perf_counter() - start) * 1000
+        async with a2s_semaphore:
+            start = time.perf_counter()
+            # O timeout vai para o a2s: com asyncio.wait_for por fora, o a2s deixava tasks pendentes ao expirar
+            info = await a2s.ainfo(address, timeout=2.5)
+            ping = (time.perf_counter() - start) * 1000
+        server_index.update_map(server, info.map_name)
         
         return {
             "status": "online", "name": info.server_name, "players": info.player_count,
@@ -79,8 +389,26 @@ async def fetch_server_info(server):
             "connect": f"`{server['ip']}:{server['porta']}`"
         }
 
+# --- Cache por filtro: todos os /mimiajuda com o mesmo filtro partilham UMA atualização por TTL ---
+_server_data_cache = {}    # (tipo, dono) -> (instante, (online, offline))
+_server_data_inflight = {} # (tipo, dono) -> task da atualização a decorrer
+
 # --- FUNÇÃO: Consultar e Ordenar Servidores ---
 async def get_sorted_server_data(tipo=None, owner=None):
+    filter_key = ((tipo or "todos").lower(), (owner or "todos").lower())
+    cached = _server_data_cache.get(filter_key)
+    if cached and time.monotonic() - cached[0] < A2S_CACHE_TTL:
+        return cached[1]
+
+    task = _server_data_inflight.get(filter_key)
+    if task is None:
+        task = asyncio.ensure_future(refresh_sorted_server_data(filter_key, tipo, owner))
+        _server_data_inflight[filter_key] = task
+        task.add_done_callback(lambda _: _server_data_inflight.pop(filter_key, None))
+    return await asyncio.shield(task)
+
+async def refresh_sorted_server_data(filter_key, tipo, owner):
+    refresh_server_index() # Para os mapas do A2S ficarem no índice do /servidor
     server_list = get_server_list()
     
     filtered_list = server_list
@@ -92,8 +420,7 @@ async def get_sorted_server_data(tipo=None, owner=None):
         tipo_lower = tipo.lower()
         filtered_list = [s for s in filtered_list if s["tipo"].lower() == tipo_lower]
 
-    tasks = [fetch_server_info(server) for server in filtered_list]
-    results = await asyncio.gather(*tasks)
+    results = await fetch_server_infos(filtered_list)
     
     online_servers = []
     offline_servers = []
@@ -106,6 +433,7 @@ async def get_sorted_server_data(tipo=None, owner=None):
             offline_servers.append(res)
             
     online_servers.sort(key=lambda s: s['ping'])
+    _server_data_cache[filter_key] = (time.monotonic(), (online_servers, offline_servers))
     return online_servers, offline_servers
 
 # --- VIEW: Painel de Paginação ---
@@ -204,12 +532,9 @@ class PaginatedServerView(View):
 # --- VIEWS: Filtros de Servidor ---
 class OwnerSelect(Select):
     def __init__(self):
-        options = [
-            discord.SelectOption(label="Todos", description="Mostrar todos os donos", emoji="🌍"),
-            discord.SelectOption(label="TUGA ARMY", description="Filtrar por TUGA ARMY", emoji="🛡️"),
-            discord.SelectOption(label="SweetRicers", description="Filtrar por SweetRicers", emoji="🍬"),
-            discord.SelectOption(label="CyberShoke", description="Filtrar por CyberShoke", emoji="⚡"),
-        ]
+        options = [discord.SelectOption(label="Todos", description="Mostrar todos os donos", emoji="🌍")]
+        for owner, emoji in OWNER_EMOJIS.items():
+            options.append(discord.SelectOption(label=owner, description=f"Filtrar por {owner}", emoji=emoji))
         super().__init__(placeholder="1. Escolha o dono do servidor...", options=options, custom_id="owner_select")
     
     async def callback(self, interaction: discord.Interaction):
@@ -266,21 +591,431 @@ async def mimiajuda(interaction: discord.Interaction):
         view=view, ephemeral=True
     )
 
+# --- AUTOCOMPLETE: /servidor (usa o índice, nunca o A2S) ---
+async def servidor_autocomplete(interaction: discord.Interaction, current: str):
+    refresh_server_index()
+    choices = []
+    for key in server_index.search(current):
+        server = server_index.servers[key]
+        current_map = server_index.maps.get(key)
+        label = f"{server['nome']} • {current_map}" if current_map else server["nome"]
+        choices.append(app_commands.Choice(name=label[:100], value=key))
+    return choices
+
+# --- COMANDO: /servidor ---
+@tree.command(name="servidor", description="Procura um servidor CS2 por nome, dono ou mapa.")
+@app_commands.describe(servidor="Nome, dono ou mapa do servidor")
+@app_commands.autocomplete(servidor=servidor_autocomplete)
+async def servidor(interaction: discord.Interaction, servidor: str):
+    await interaction.response.defer(ephemeral=True)
+    refresh_server_index()
+
+    # Se o utilizador não escolheu uma sugestão, usa o primeiro resultado da pesquisa
+    # (texto sem nenhum token, ex: '!!!', não corresponde a nada)
+    if servidor in server_index.servers:
+        key = servidor
+    elif tokenize(servidor):
+        key = next(iter(server_index.search(servidor, limit=1)), None)
+    else:
+        key = None
+    if key is None:
+        await interaction.followup.send(f"❌ Nenhum servidor encontrado para `{servidor}`.", ephemeral=True)
+        return
+
+    server = server_index.servers[key]
+    info = await fetch_server_info(server)
+    if info["status"] != "online":
+        embed = discord.Embed(title=f"🔴 {server['nome']}", color=discord.Color.red(), description="Servidor offline ou sem resposta.")
+        embed.add_field(name="🔗 Endereço", value=info["connect"], inline=False)
+    else:
+        embed = discord.Embed(title=f"🟢 {info['name']}", color=discord.Color.green())
+        embed.add_field(name="🧍 Jogadores", value=f"`{info['players']}/{info['max_players']}`", inline=True)
+        embed.add_field(name="🗺️ Mapa", value=f"`{info['map']}`", inline=True)
+        embed.add_field(name="📶 Ping", value=f"`{info['ping']:.1f} ms`", inline=True)
+        embed.add_field(name="🔗 Conectar", value=info["connect"], inline=False)
+    embed.set_footer(text=f"Tipo: {server.get('tipo', 'N/A')} • Dono: {server_owner(server) or 'N/A'}")
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
 # ===================================================================
 # --- FIM DA SECÇÃO: SERVIDORES CS2 ---
 # ===================================================================
 
 
+# ===================================================================
+# --- SECÇÃO: DESCOBERTA DE SERVIDORES (Master Server da Steam) ---
+# ===================================================================
+
+# --- Configuração do Master Server ---
+MASTER_SERVER_HOST = os.getenv("MASTER_SERVER_HOST", "hl2master.steampowered.com")
+MASTER_SERVER_PORT = int(os.getenv("MASTER_SERVER_PORT", "27011"))
+MASTER_RESPONSE_HEADER = b"\xFF\xFF\xFF\xFF\x66\x0A"
+MASTER_SEED = ("0.0.0.0", 0) # Primeiro pedido e marcador de fim da lista
+CS2_APP_ID = 730
+MASTER_REGIONS = {
+    "Mundo": 0xFF, "Europa": 0x03, "EUA Este": 0x00, "EUA Oeste": 0x01, "América do Sul": 0x02,
+    "Ásia": 0x04, "Austrália": 0x05, "Médio Oriente": 0x06, "África": 0x07,
+}
+# Palavras no nome/tags -> tipo (a primeira que bater ganha)
+TIPO_KEYWORDS = [
+    ("Retakes", ("retake",)), ("Surf", ("surf",)), ("Jailbreak", ("jail", "jb")),
+    ("Bhop", ("bhop", "bunnyhop")), ("AWP", ("awp",)), ("Duelos", ("duel", "1v1")),
+    ("Arenas", ("arena",)), ("FFA", ("ffa", "deathmatch", "dm")),
+]
+TIPO_DEFAULT = "Outros"
+
+def infer_tipo(name, keywords=""):
+    """Adivinha o tipo de jogo pelo nome e pelas tags (keywords) do A2S."""
+    tokens = tokenize(f"{name} {keywords}")
+    for tipo, words in TIPO_KEYWORDS:
+        for token in tokens:
+            # Palavras curtas (jb, dm, ffa) têm de bater certo; as outras podem ser prefixo (retake -> retakes)
+            if any(token == word or (len(word) > 3 and token.startswith(word)) for word in words):
+                return tipo
+    return TIPO_DEFAULT
+
+def build_master_filter(tags=None):
+    """Filtro do protocolo do master server (ex: \\appid\\730\\gametype\\retakes)."""
+    filter_str = f"\\appid\\{CS2_APP_ID}"
+    if tags:
+        filter_str += "\\gametype\\" + ",".join(tags)
+    return filter_str
+
+class MasterServerProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.queue.put_nowait(data)
+
+    def error_received(self, exc):
+        self.queue.put_nowait(exc)
+
+def parse_master_response(data):
+    """Devolve (lista de (ip, porta), chegou_ao_fim)."""
+    if not data.startswith(MASTER_RESPONSE_HEADER):
+        raise ValueError("Resposta do master server inválida")
+    batch = []
+    for offset in range(len(MASTER_RESPONSE_HEADER), len(data) - 5, 6):
+        address = (socket.inet_ntoa(data[offset:offset + 4]), struct.unpack(">H", data[offset + 4:offset + 6])[0])
+        if address == MASTER_SEED:
+            return batch, True
+        batch.append(address)
+    return batch, False
+
+# --- FUNÇÃO: Pedir a lista ao master server, página a página ---
+async def query_master_server(region="Mundo", tags=None, address=None, timeout=5.0, retries=2):
+    """Gerador assíncrono: devolve um lote de endereços por cada página do master server."""
+    loop = asyncio.get_running_loop()
+    address = address or (MASTER_SERVER_HOST, MASTER_SERVER_PORT)
+    transport, protocol = await loop.create_datagram_endpoint(MasterServerProtocol, remote_addr=address)
+    request_tail = b"\x00" + build_master_filter(tags).encode() + b"\x00"
+    seed = MASTER_SEED
+    try:
+        while True:
+            request = b"\x31" + bytes([MASTER_REGIONS[region]]) + f"{seed[0]}:{seed[1]}".encode() + request_tail
+            for attempt in range(retries + 1):
+                # Respostas atrasadas a pedidos anteriores não podem passar pela resposta a este
+                while not protocol.queue.empty():
+                    protocol.queue.get_nowait()
+                transport.sendto(request)
+                try:
+                    data = await asyncio.wait_for(protocol.queue.get(), timeout)
+                    break
+                except asyncio.TimeoutError:
+                    print(f"DEBUG: Master server sem resposta (tentativa {attempt + 1}/{retries + 1})")
+            else:
+                raise asyncio.TimeoutError(f"Master server sem resposta após {retries + 1} tentativas")
+            if isinstance(data, Exception):
+                raise data
+
+            batch, finished = parse_master_response(data)
+            if batch:
+                yield batch
+                if not finished and batch[-1] == seed:
+                    # A página não avançou: pedir outra vez com o mesmo seed devolvia-a para sempre
+                    raise ValueError(f"Master server não avançou para lá de {seed[0]}:{seed[1]}")
+                seed = batch[-1]
+            if finished or not batch:
+                return
+    finally:
+        transport.close()
+
+# --- FUNÇÃO: Consultar um servidor descoberto (nome + tags) ---
+async def fetch_discovered_server(address):
+    try:
+        async with a2s_semaphore:
+            info = await a2s.ainfo(address, timeout=2.5)
+    except Exception:
+        return None
+    return {
+        "nome": info.server_name, "ip": address[0], "porta": address[1],
+        "tipo": infer_tipo(info.server_name, info.keywords or ""),
+    }
+
+# --- FUNÇÃO: Descobrir servidores e juntá-los ao servers.json ---
+async def discover_servers(region="Mundo", tags=None, master_address=None):
+    """Lê o master server página a página e grava cada lote novo logo que chega.
+    Se o master deixar de responder (ou de avançar) a meio, devolve o que já foi guardado com incomplete=True."""
+    start = time.perf_counter()
+    known = {server_key(s) for s in get_server_list()}
+    seen = set()
+    added = 0
+
+    async def probe(addresses):
+        nonlocal added
+        results = await asyncio.gather(*(fetch_discovered_server(a) for a in addresses))
+        new_servers = [s for s in results if s]
+        if new_servers:
+            save_server_list(get_server_list() + new_servers)
+            refresh_server_index()
+            added += len(new_servers)
+
+    # Cada página é consultada por A2S em paralelo enquanto se pede a seguinte
+    probes = []
+    incomplete = False
+    try:
+        async for batch in query_master_server(region, tags, address=master_address):
+            new_addresses = []
+            for address in batch:
+                key = f"{address[0]}:{address[1]}"
+                seen.add(key)
+                if key not in known:
+                    known.add(key)
+                    new_addresses.append(address)
+            if new_addresses:
+                probes.append(asyncio.create_task(probe(new_addresses)))
+    except (asyncio.TimeoutError, ValueError) as e:
+        if not seen:
+            raise # Nem a primeira página chegou: falhou de todo
+        print(f"⚠️ Descoberta interrompida: {e or 'master server sem resposta'}")
+        incomplete = True
+    finally:
+        await asyncio.gather(*probes) # Os lotes já recebidos são sempre gravados
+
+    found = len(seen)
+    elapsed = time.perf_counter() - start
+    rate = added / elapsed if elapsed > 0 else 0.0
+    status = " (INCOMPLETA: master server parou a meio)" if incomplete else ""
+    print(f"🛰️ Descoberta ({region}){status}: {found} endereços, {added} servidores novos em {elapsed:.1f} s ({rate:.1f}/s)")
+    return {"found": found, "added": added, "elapsed": elapsed, "per_second": rate, "incomplete": incomplete}
+
+discovery_lock = asyncio.Lock()
+
+# --- COMANDO: /descobrir (só administradores) ---
+@tree.command(name="descobrir", description="Procura servidores CS2 no master server da Steam e adiciona-os à lista.")
+@app_commands.describe(regiao="Região do master server", tags="Tags separadas por vírgula (ex: retakes,mirage)")
+@app_commands.choices(regiao=[app_commands.Choice(name=r, value=r) for r in MASTER_REGIONS])
+@app_commands.default_permissions(administrator=True)
+async def descobrir(interaction: discord.Interaction, regiao: str = "Europa", tags: str = ""):
+    if discovery_lock.locked():
+        await interaction.response.send_message("⏳ Já está a decorrer uma descoberta. Tenta daqui a pouco.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    tag_list = [t.strip() for t in tags.split(",") if t.strip()]
+    async with discovery_lock:
+        try:
+            result = await discover_servers(regiao, tag_list)
+        except asyncio.TimeoutError:
+            print("ERRO na descoberta de servidores: master server sem resposta.")
+            await interaction.followup.send("❌ O master server da Steam não respondeu (Timeout). Tenta novamente.", ephemeral=True)
+            return
+        except Exception as e:
+            print(f"ERRO na descoberta de servidores: {e}")
+            await interaction.followup.send("❌ Falhou a consulta ao master server da Steam.", ephemeral=True)
+            return
+
+    warning = "\n⚠️ Descoberta **incompleta**: o master server parou a meio." if result["incomplete"] else ""
+    await interaction.followup.send(
+        f"🛰️ **{result['added']}** servidores novos ({result['found']} endereços vistos) "
+        f"em {result['elapsed']:.1f} s — {result['per_second']:.1f} servidores/s.{warning}",
+        ephemeral=True
+    )
+
+# ===================================================================
+# --- FIM DA SECÇÃO: DESCOBERTA DE SERVIDORES ---
+# ===================================================================
+
+
+# ===================================================================
+# --- SECÇÃO: PAINEL DE STATUS FIXO (/painel) ---
+# Uma mensagem afixada por canal, editada só quando o conteúdo muda.
+# Quem só olha para o painel não gasta consultas A2S nem interações.
+# ===================================================================
+
+STATUS_BOARDS_FILE = "status_boards.json"
+STATUS_BOARD_TICK = 5             # De quanto em quanto tempo (s) o loop verifica os painéis
+STATUS_BOARD_EDIT_INTERVAL = 15   # Mínimo (s) entre edições no mesmo canal; mudanças entretanto são juntadas
+STATUS_BOARD_MAX_SERVERS = 20     # Limite de campos por embed (o Discord aceita 25)
+
+class StatusBoard:
+    def __init__(self, channel_id, message_id, filtro):
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.filtro = filtro
+        self.field_hashes = None # Hash de cada campo do último embed enviado
+        self.next_edit_at = 0.0
+
+    def to_dict(self):
+        return {"channel_id": self.channel_id, "message_id": self.message_id, "filtro": self.filtro}
+
+status_boards = {} # channel_id -> StatusBoard
+
+# --- FUNÇÕES: Ler/Gravar painéis (sobrevivem a reinícios) ---
+def load_status_boards():
+    try:
+        with open(STATUS_BOARDS_FILE, "r", encoding="utf-8") as f:
+            for data in json.load(f):
+                status_boards[data["channel_id"]] = StatusBoard(data["channel_id"], data["message_id"], data["filtro"])
+    except FileNotFoundError:
+        pass
+    except json.JSONDecodeError:
+        print(f"⚠️ ERRO: Arquivo {STATUS_BOARDS_FILE} mal formatado.")
+
+def save_status_boards():
+    with open(STATUS_BOARDS_FILE, "w", encoding="utf-8") as f:
+        json.dump([b.to_dict() for b in status_boards.values()], f, indent=2)
+
+# --- FUNÇÃO: Campos do painel (nome, valor) ---
+def render_status_fields(servers, results):
+    # Sem ping: muda a cada consulta e obrigaria a editar o painel sempre
+    fields = []
+    for server, info in zip(servers, results):
+        address = f"`{server['ip']}:{server['porta']}`"
+        if info["status"] == "online":
+            name = f"🟢 {info['name']}"
+            value = f"🧍 `{info['players']}/{info['max_players']}` | 🗺️ `{info['map']}`\n🔗 {address}"
+        else:
+            name = f"🔴 {server['nome']}"
+            value = f"Offline\n🔗 {address}"
+        fields.append((name[:256], value[:1024]))
+    return fields
+
+def hash_field(field):
+    return hashlib.sha1("\0".join(field).encode("utf-8")).hexdigest()
+
+def build_status_embed(board, fields):
+    embed = discord.Embed(
+        title="📌 Painel de Servidores",
+        color=discord.Color.blurple(),
+        description=f"Filtro: `{board.filtro or 'todos'}` • Última alteração: <t:{int(time.time())}:R>"
+    )
+    if not fields:
+        embed.add_field(name="ℹ️ Nenhum servidor", value="Nenhum servidor corresponde a este filtro.", inline=False)
+    for name, value in fields:
+        embed.add_field(name=name, value=value, inline=True)
+    embed.set_footer(text="Atualiza sozinho quando jogadores, mapa ou estado mudam.")
+    return embed
+
+# --- FUNÇÃO: Atualizar um painel (só edita se algum campo mudou) ---
+async def refresh_status_board(board, force=False):
+    if not force and time.monotonic() < board.next_edit_at:
+        return # Ainda não podemos editar: as mudanças ficam para a próxima volta
+    refresh_server_index()
+    servers = [server_index.servers[k] for k in server_index.search(board.filtro, limit=STATUS_BOARD_MAX_SERVERS)]
+    results = await fetch_server_infos(servers)
+    fields = render_status_fields(servers, results)
+    hashes = [hash_field(f) for f in fields]
+    if not force and hashes == board.field_hashes:
+        return
+
+    # O intervalo conta a partir da tentativa: uma edição falhada também espera pela próxima janela
+    board.next_edit_at = time.monotonic() + STATUS_BOARD_EDIT_INTERVAL
+    channel = client.get_channel(board.channel_id) or await client.fetch_channel(board.channel_id)
+    await channel.get_partial_message(board.message_id).edit(embed=build_status_embed(board, fields))
+    if board.field_hashes is not None and len(hashes) == len(board.field_hashes):
+        changed = sum(1 for old, new in zip(board.field_hashes, hashes) if old != new)
+        print(f"DEBUG: Painel {board.channel_id} editado ({changed} campos mudaram)")
+    board.field_hashes = hashes
+
+# --- LOOP: Atualiza todos os painéis em segundo plano ---
+@tasks.loop(seconds=STATUS_BOARD_TICK)
+async def status_board_loop():
+    # Todos os painéis em paralelo: um canal com servidores offline (2.5 s cada) não atrasa os outros
+    boards = list(status_boards.values())
+    results = await asyncio.gather(*(refresh_status_board(b) for b in boards), return_exceptions=True)
+    for board, result in zip(boards, results):
+        if isinstance(result, (discord.NotFound, discord.Forbidden)):
+            if isinstance(result, discord.NotFound):
+                print(f"⚠️ Painel do canal {board.channel_id} foi apagado. A remover.")
+            else:
+                print(f"⚠️ Sem permissão para editar o painel do canal {board.channel_id}. A remover.")
+            if status_boards.get(board.channel_id) is board: # Pode já ter sido substituído pelo /painel
+                del status_boards[board.channel_id]
+                save_status_boards()
+        elif isinstance(result, Exception):
+            print(f"Erro ao atualizar painel {board.channel_id}: {result}")
+
+@status_board_loop.before_loop
+async def before_status_board_loop():
+    await client.wait_until_ready()
+
+# --- FUNÇÃO: Publicar e afixar uma nova mensagem de painel ---
+async def post_status_board(channel, filtro):
+    message = await channel.send(embed=discord.Embed(title="📌 Painel de Servidores", description="A carregar..."))
+    try:
+        await message.pin()
+    except discord.HTTPException:
+        print(f"⚠️ Sem permissão para afixar o painel no canal {channel.id}.")
+    board = StatusBoard(channel.id, message.id, filtro)
+    status_boards[board.channel_id] = board
+    save_status_boards()
+    return board
+
+# --- COMANDO: /painel (só administradores) ---
+@tree.command(name="painel", description="Afixa neste canal um painel de servidores que se atualiza sozinho.")
+@app_commands.describe(filtro="Nome, dono, tipo ou mapa (igual ao /servidor). Vazio = primeiros servidores.")
+@app_commands.default_permissions(administrator=True)
+async def painel(interaction: discord.Interaction, filtro: str = ""):
+    await interaction.response.defer(ephemeral=True)
+
+    try:
+        board = status_boards.get(interaction.channel_id)
+        if board:
+            # Já existe painel neste canal: só muda o filtro e reescreve a mesma mensagem
+            board.filtro = filtro
+            save_status_boards()
+            try:
+                await refresh_status_board(board, force=True)
+            except discord.NotFound:
+                # A mensagem antiga foi apagada: publica uma nova no lugar dela
+                board = await post_status_board(interaction.channel, filtro)
+                await refresh_status_board(board, force=True)
+        else:
+            board = await post_status_board(interaction.channel, filtro)
+            await refresh_status_board(board, force=True)
+    except discord.HTTPException as e:
+        print(f"ERRO ao criar painel no canal {interaction.channel_id}: {e}")
+        await interaction.followup.send("❌ Não consegui publicar ou editar o painel neste canal (faltam permissões?).", ephemeral=True)
+        return
+
+    await interaction.followup.send("📌 Painel criado/atualizado neste canal.", ephemeral=True)
+
+# --- COMANDO: /painel-parar ---
+@tree.command(name="painel-parar", description="Deixa de atualizar o painel de servidores deste canal.")
+@app_commands.default_permissions(administrator=True)
+async def painel_parar(interaction: discord.Interaction):
+    board = status_boards.pop(interaction.channel_id, None)
+    if board is None:
+        await interaction.response.send_message("❌ Não há nenhum painel neste canal.", ephemeral=True)
+        return
+    save_status_boards()
+    await interaction.response.send_message("🛑 O painel deste canal deixou de ser atualizado.", ephemeral=True)
+
+# ===================================================================
+# --- FIM DA SECÇÃO: PAINEL DE STATUS ---
+# ===================================================================
+
+
 # ===================================================================
 # --- SECÇÃO FACEIT (MODIFICADA PARA MENSAGENS PÚBLICAS) ---
 # ===================================================================
 
 async def get_faceit_player(nickname):
     """Busca os dados básicos de um jogador (ID, elo, nível, avatar)."""
-    url = f"https://open.faceit.com/data/v4/players?nickname={nickname}"
+    url = f"{FACEIT_API_BASE}/players?nickname={nickname}"
     try:
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with client.http_session.get(url, headers=FACEIT_HEADERS, timeout=timeout) as resp:
+        async with http_pool.get(url, "faceit_player", headers=FACEIT_HEADERS) as resp:
             if resp.status == 200:
                 print("DEBUG: [1/3] get_faceit_player SUCESSO")
                 return await resp.json()
@@ -296,10 +1031,9 @@ async def get_faceit_player(nickname):
 
 async def get_faceit_stats(player_id):
     """Busca as estatísticas gerais (K/D, Winrate) de um jogador."""
-    url = f"https://open.faceit.com/data/v4/players/{player_id}/stats/cs2"
+    url = f"{FACEIT_API_BASE}/players/{player_id}/stats/cs2"
     try:
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with client.http_session.get(url, headers=FACEIT_HEADERS, timeout=timeout) as resp:
+        async with http_pool.get(url, "faceit_stats", headers=FACEIT_HEADERS) as resp:
             if resp.status == 200:
                 print("DEBUG: [2/3] get_faceit_stats SUCESSO")
                 return await resp.json()
@@ -316,10 +1050,9 @@ async def get_faceit_stats(player_id):
 async def get_faceit_history_24h(player_id):
     """Busca o histórico de partidas das últimas 24 horas."""
     from_timestamp = int(time.time()) - 86400 # 24 * 60 * 60
-    url = f"https://open.faceit.com/data/v4/players/{player_id}/history?game=cs2&from={from_timestamp}&limit=100"
+    url = f"{FACEIT_API_BASE}/players/{player_id}/history?game=cs2&from={from_timestamp}&limit=100"
     try:
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with client.http_session.get(url, headers=FACEIT_HEADERS, timeout=timeout) as resp:
+        async with http_pool.get(url, "faceit_stats", headers=FACEIT_HEADERS) as resp:
             if resp.status == 200:
                 print("DEBUG: [3/3] get_faceit_history SUCESSO")
                 return await resp.json()
@@ -336,10 +1069,9 @@ async def get_faceit_history_24h(player_id):
 # --- NOVA FUNÇÃO HELPER ---
 async def get_last_match(player_id):
     """Busca a última partida (limit=1) de um jogador."""
-    url = f"https://open.faceit.com/data/v4/players/{player_id}/history?game=cs2&limit=1"
+    url = f"{FACEIT_API_BASE}/players/{player_id}/history?game=cs2&limit=1"
     try:
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with client.http_session.get(url, headers=FACEIT_HEADERS, timeout=timeout) as resp:
+        async with http_pool.get(url, "faceit_stats", headers=FACEIT_HEADERS) as resp:
             if resp.status == 200:
                 data = await resp.json()
                 if data.get('items'):
@@ -359,10 +1091,9 @@ async def get_last_match(player_id):
 # --- NOVA FUNÇÃO HELPER ---
 async def get_match_stats(match_id):
     """Busca as estatísticas detalhadas de uma partida específica."""
-    url = f"https://open.faceit.com/data/v4/matches/{match_id}/stats"
+    url = f"{FACEIT_API_BASE}/matches/{match_id}/stats"
     try:
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with client.http_session.get(url, headers=FACEIT_HEADERS, timeout=timeout) as resp:
+        async with http_pool.get(url, "faceit_stats", headers=FACEIT_HEADERS) as resp:
             if resp.status == 200:
                 print(f"DEBUG: [Veademo 3/3] get_match_stats SUCESSO para {match_id}")
                 return await resp.json()
@@ -727,6 +1458,18 @@ async def para(interaction: discord.Interaction):
 # --- FIM DA SECÇÃO DE VOZ ---
 # ===================================================================
 
+# --- COMANDO: /http-stats (só administradores) ---
+@tree.command(name="http-stats", description="Mostra o estado do pool de ligações HTTP (Faceit).")
+@app_commands.default_permissions(administrator=True)
+async def http_stats(interaction: discord.Interaction):
+    stats = http_pool.stats()
+    embed = discord.Embed(title="🌐 Pool HTTP", color=discord.Color.blurple())
+    embed.add_field(name="Ligações ativas", value=f"`{stats['active']}`", inline=True)
+    embed.add_field(name="Pedidos totais", value=f"`{stats['requests']}`", inline=True)
+    embed.add_field(name="Reutilização", value=f"`{stats['reuse_ratio']:.0%}` ({stats['reused_connections']} reutilizadas / {stats['new_connections']} novas)", inline=False)
+    embed.add_field(name="Fila de espera", value=f"`{stats['queued']}` pedidos | média `{stats['queue_wait_avg_ms']:.1f} ms` | máx `{stats['queue_wait_max_ms']:.1f} ms`", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # --- EVENTO: Bot pronto (CORRIGIDO) ---
 @client.event
 async def on_ready():
@@ -734,21 +1477,22 @@ async def on_ready():
     
     print(f"✅ Bot logado como {client.user}")
     print("📡 Comandos sincronizados globalmente.")
-    print("💬 Usa /mimiajuda, /checkmyelo, /elodorei, /veademo, /adoro-te, ou /para.") # --- ESTA É A LINHA CORRETA ---
+    print("💬 Usa /mimiajuda, /servidor, /descobrir, /painel, /checkmyelo, /elodorei, /veademo, /adoro-te, ou /para.") # --- ESTA É A LINHA CORRETA ---
 
 
 # --- EXECUÇÃO (Com verificação de Token) ---
-if TOKEN is None:
-    print("="*40)
-    print("❌ ERRO: DISCORD_TOKEN NÃO ENCONTRADO")
-    print("Verifica se criaste o ficheiro .env e definiste a variável DISCORD_TOKEN.")
-    print("="*40)
-elif FACEIT_API_KEY is None:
-    print("="*40)
-    print("⚠️ AVISO: FACEIT_API_KEY NÃO ENCONTRADA")
-    print("O comando /mimiajuda vai funcionar, mas os comandos de Faceit irão falhar.")
-    print("Adiciona a FACEIT_API_KEY ao teu ficheiro .env.")
-    print("="*40)
-    client.run(TOKEN) # Mesmo assim, liga o bot
-else:
-    client.run(TOKEN)
\ No newline at end of file
+if __name__ == "__main__":
+    if TOKEN is None:
+        print("="*40)
+        print("❌ ERRO: DISCORD_TOKEN NÃO ENCONTRADO")
+        print("Verifica se criaste o ficheiro .env e definiste a variável DISCORD_TOKEN.")
+        print("="*40)
+    elif FACEIT_API_KEY is None:
+        print("="*40)
+        print("⚠️ AVISO: FACEIT_API_KEY NÃO ENCONTRADA")
+        print("O comando /mimiajuda vai funcionar, mas os comandos de Faceit irão falhar.")
+        print("Adiciona a FACEIT_API_KEY ao teu ficheiro .env.")
+        print("="*40)
+        client.run(TOKEN) # Mesmo assim, liga o bot
+    else:
+        client.run(TOKEN)
\ No newline at end of file
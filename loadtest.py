@@ -0,0 +1,528 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import socket
+import struct
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from aiohttp import web
+
+import bot
+
+# ===================================================================
+# --- LOAD TEST: simula centenas de interações (slash commands) ---
+# Corre offline: A2S e Faceit são servidores locais (127.0.0.1).
+# Uso: python loadtest.py --rate 200 --requests 1000
+# ===================================================================
+
+DISCORD_INTERACTION_DEADLINE = 3.0 # O Discord exige uma resposta inicial em 3 s
+LOOP_LAG_INTERVAL = 0.05 # Intervalo do monitor de lag do event loop (s)
+FAKE_MAPS = ["de_mirage", "de_inferno", "de_dust2", "de_nuke", "de_ancient", "de_anubis", "surf_mesa"]
+FAKE_TIPOS = ["Retakes", "Surf", "FFA", "AWP", "Arenas"]
+
+
+# --- Interaction falsa (regista os tempos de resposta) ---
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    def is_done(self):
+        return self._interaction.acked_at is not None
+
+    async def send_message(self, content=None, *, embed=None, view=None, ephemeral=False, **kwargs):
+        self._interaction._ack(view)
+
+    async def defer(self, *, ephemeral=False, thinking=False):
+        self._interaction._ack(None)
+
+    async def edit_message(self, *, content=None, embed=None, view=None, **kwargs):
+        self._interaction._ack(view)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, embed=None, view=None, ephemeral=False, **kwargs):
+        self._interaction._finish(view)
+
+
+class FakeInteraction:
+    """Imita o suficiente de discord.Interaction para correr os handlers do bot."""
+
+    def __init__(self, command, arrived_at=None):
+        self.command_name = command
+        self.created_at = arrived_at or time.perf_counter() # Quando o Discord entregou a interação
+        self.acked_at = None
+        self.finished_at = None
+        self.last_view = None
+        self.user = SimpleNamespace(id=0, name="loadtest", voice=None)
+        self.guild = SimpleNamespace(id=0, voice_client=None)
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    def _ack(self, view):
+        if self.acked_at is None:
+            self.acked_at = time.perf_counter()
+        if view is not None:
+            self.last_view = view
+
+    def _finish(self, view):
+        self.finished_at = time.perf_counter()
+        if view is not None:
+            self.last_view = view
+
+    async def edit_original_response(self, *, content=None, embed=None, view=None, **kwargs):
+        self._finish(view)
+
+
+# --- Servidor A2S falso (UDP) ---
+def build_a2s_info(name, map_name, players, max_players, keywords=""):
+    """Constrói uma resposta A2S_INFO (Source) válida para o python-a2s."""
+    def cstr(value):
+        return value.encode("utf-8") + b"\x00"
+
+    return (
+        b"\xFF\xFF\xFF\xFF\x49" + struct.pack("<B", 17)
+        + cstr(name) + cstr(map_name) + cstr("cs2") + cstr("Counter-Strike 2")
+        + struct.pack("<HBBB", 730, players, max_players, 0)
+        + b"dl" + struct.pack("<BB", 0, 1) + cstr("1.0.0.0")
+        + struct.pack("<B", 0x20) + cstr(keywords)
+    )
+
+
+class FakeA2SProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server, delay, respond=True):
+        self.server = server
+        self.delay = delay
+        self.respond = respond
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not self.respond or not data.startswith(b"\xFF\xFF\xFF\xFF\x54"):
+            return
+        max_players = 10
+        payload = build_a2s_info(
+            self.server["nome"], random.choice(FAKE_MAPS),
+            random.randint(0, max_players - 1), max_players, self.server.get("tags", ""),
+        )
+        delay = random.uniform(0, self.delay) if self.delay else 0
+        asyncio.get_running_loop().call_later(delay, self.transport.sendto, payload, addr)
+
+
+async def start_fake_a2s(count, delay, offline_ratio):
+    """Abre `count` servidores A2S em 127.0.0.1 e devolve (lista para servers.json, transports)."""
+    loop = asyncio.get_running_loop()
+    servers, transports = [], []
+    for i in range(count):
+        tipo = FAKE_TIPOS[i % len(FAKE_TIPOS)]
+        server = {"nome": f"LoadTest {tipo} #{i + 1}", "ip": "127.0.0.1", "porta": 0, "tipo": tipo,
+                  "tags": f"{tipo.lower()},{random.choice(FAKE_MAPS)}"}
+        protocol = FakeA2SProtocol(server, delay, respond=random.random() >= offline_ratio)
+        transport, _ = await loop.create_datagram_endpoint(lambda p=protocol: p, local_addr=("127.0.0.1", 0))
+        server["porta"] = transport.get_extra_info("sockname")[1]
+        servers.append(server)
+        transports.append(transport)
+    return servers, transports
+
+
+# --- Master server falso (UDP) ---
+class FakeMasterServerProtocol(asyncio.DatagramProtocol):
+    """Responde em páginas de `page_size` endereços; a última termina com 0.0.0.0:0.
+    Como o master real, cada página repete o endereço usado como seed (duplicados a remover)."""
+
+    def __init__(self, addresses, page_size=231):
+        self.addresses = addresses
+        self.page_size = page_size
+        self.positions = {address: i for i, address in enumerate(addresses)}
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data.startswith(b"\x31"):
+            return
+        seed_ip, seed_port = data[2:data.index(b"\x00", 2)].decode().rsplit(":", 1)
+        seed = (seed_ip, int(seed_port))
+        start = 0 if seed == bot.MASTER_SEED else self.positions.get(seed, len(self.addresses))
+        page = self.addresses[start:start + self.page_size]
+        if start + self.page_size >= len(self.addresses):
+            page = page + [bot.MASTER_SEED]
+        payload = bot.MASTER_RESPONSE_HEADER + b"".join(
+            socket.inet_aton(ip) + struct.pack(">H", port) for ip, port in page
+        )
+        self.transport.sendto(payload, addr)
+
+
+async def start_fake_master(servers):
+    """Publica os servidores falsos num master server local e devolve (transport, endereço)."""
+    addresses = [(s["ip"], s["porta"]) for s in servers]
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: FakeMasterServerProtocol(addresses), local_addr=("127.0.0.1", 0)
+    )
+    return transport, transport.get_extra_info("sockname")[:2]
+
+
+# --- API Faceit falsa (HTTP) ---
+def build_fake_faceit_app(delay):
+    routes = web.RouteTableDef()
+
+    async def wait():
+        if delay:
+            await asyncio.sleep(random.uniform(0, delay))
+
+    @routes.get("/players")
+    async def player(request):
+        await wait()
+        nickname = request.query.get("nickname", "anon")
+        return web.json_response({
+            "player_id": f"pid-{nickname}", "nickname": nickname, "avatar": "",
+            "faceit_url": "https://www.faceit.com/{lang}/players/" + nickname,
+            "games": {"cs2": {"faceit_elo": random.randint(800, 3000), "skill_level": random.randint(1, 10)}},
+        })
+
+    @routes.get("/players/{player_id}/stats/cs2")
+    async def stats(request):
+        await wait()
+        return web.json_response({"lifetime": {
+            "Average K/D Ratio": "1.12", "Average Headshots %": "48", "Win Rate %": "52", "Matches": "1337",
+        }})
+
+    @routes.get("/players/{player_id}/history")
+    async def history(request):
+        await wait()
+        player_id = request.match_info["player_id"]
+        limit = int(request.query.get("limit", "20"))
+        items = []
+        for i in range(min(limit, 8)):
+            items.append({
+                "match_id": f"match-{player_id}-{i}", "status": "FINISHED",
+                "faceit_url": "https://www.faceit.com/{lang}/cs2/room/" + f"match-{i}",
+                "teams": {
+                    "faction1": {"players": [{"player_id": player_id}]},
+                    "faction2": {"players": [{"player_id": "pid-other"}]},
+                },
+                "results": {"winner": random.choice(["faction1", "faction2"])},
+            })
+        return web.json_response({"items": items})
+
+    @routes.get("/matches/{match_id}/stats")
+    async def match_stats(request):
+        await wait()
+        player_id = request.match_info["match_id"].split("-")[1:-1]
+        return web.json_response({"rounds": [{
+            "round_stats": {"Map": random.choice(FAKE_MAPS), "Score": "13 / 9"},
+            "teams": [{
+                "team_stats": {"Team Win": "1"},
+                "players": [{"player_id": "-".join(player_id), "player_stats": {
+                    "Kills": "21", "Deaths": "14", "Assists": "5", "K/D Ratio": "1.5",
+                    "Headshots %": "52", "MVPs": "4",
+                }}],
+            }],
+        }]})
+
+    app = web.Application()
+    app.add_routes(routes)
+    return app
+
+
+async def start_fake_faceit(delay):
+    runner = web.AppRunner(build_fake_faceit_app(delay), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+# --- Cenários (chamam os handlers reais do bot.py) ---
+async def interact(record, name, handler, *args, arrived_at=None):
+    """Entrega uma interação como o discord.py: o handler corre na sua própria task.
+    Se o loop estiver ocupado, a task demora a arrancar e isso aparece na latência do ack."""
+    interaction = FakeInteraction(name, arrived_at)
+    task = asyncio.create_task(handler(interaction, *args))
+    try:
+        result = await task
+    finally:
+        record(interaction) # Mesmo que o handler rebente: sem ack conta como prazo falhado
+    return interaction, result
+
+
+async def autocomplete(interaction, current):
+    choices = await bot.servidor_autocomplete(interaction, current)
+    interaction._ack(None) # O autocomplete responde ao devolver as opções
+    return choices
+
+
+async def scenario_mimiajuda(record, arrived_at):
+    interaction, _ = await interact(record, "mimiajuda", bot.mimiajuda.callback, arrived_at=arrived_at)
+    filter_view = interaction.last_view
+
+    interaction, _ = await interact(record, "search_button", filter_view.search_button.callback)
+    page_view = interaction.last_view
+
+    # Com uma só página os botões estão desativados, o Discord nunca enviaria o clique
+    if page_view.total_pages > 1:
+        await interact(record, "next_page", page_view.next_page)
+        await interact(record, "prev_page", page_view.prev_page)
+    filter_view.stop()
+    page_view.stop()
+
+
+async def scenario_checkmyelo(record, arrived_at):
+    await interact(record, "checkmyelo", bot.checkmyelo.callback, f"player{random.randint(1, 9999)}", arrived_at=arrived_at)
+
+
+async def scenario_veademo(record, arrived_at):
+    await interact(record, "veademo", bot.veademo.callback, f"player{random.randint(1, 9999)}", arrived_at=arrived_at)
+
+
+async def scenario_servidor(record, arrived_at):
+    query = random.choice(["", "load", "retakes", "mirage", "surf #1"])
+    _, choices = await interact(record, "autocomplete", autocomplete, query, arrived_at=arrived_at)
+    await interact(record, "servidor", bot.servidor.callback, choices[0].value if choices else "loadtest")
+
+
+SCENARIOS = {
+    "mimiajuda": scenario_mimiajuda,
+    "checkmyelo": scenario_checkmyelo,
+    "veademo": scenario_veademo,
+    "servidor": scenario_servidor,
+}
+
+
+# --- Métricas ---
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)) # Nearest-rank
+    return ordered[index]
+
+
+class LoopLagMonitor:
+    """Mede o atraso do event loop: quanto tempo um sleep demora a mais do que o pedido."""
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+
+class Stats:
+    def __init__(self):
+        self.ack = {}
+        self.total = {}
+        self.missed = {}
+        self.errors = {}
+        self.abandoned_tasks = 0
+        self.abandoned_example = None
+        self.discovery = None
+        self.http_pool = None
+
+    def record(self, interaction):
+        name = interaction.command_name
+        end = interaction.finished_at or interaction.acked_at or time.perf_counter()
+        ack = (interaction.acked_at - interaction.created_at) if interaction.acked_at else None
+        self.ack.setdefault(name, [])
+        self.total.setdefault(name, []).append(end - interaction.created_at)
+        self.missed.setdefault(name, 0)
+        if ack is None or ack > DISCORD_INTERACTION_DEADLINE:
+            self.missed[name] += 1
+        if ack is not None:
+            self.ack[name].append(ack)
+
+    def record_error(self, scenario, exc):
+        self.errors.setdefault(scenario, []).append(repr(exc))
+
+    def loop_exception_handler(self, loop, context):
+        # Tasks destruídas ainda pendentes são um defeito do bot (fuga de tasks), não ruído do teste:
+        # contamos aqui para não inundar o terminal e reportamos no fim (e falham o --fail-on-miss)
+        if context.get("message", "").startswith("Task was destroyed"):
+            self.abandoned_tasks += 1
+            if self.abandoned_tasks == 1:
+                self.abandoned_example = repr(context.get("task"))
+            return
+        loop.default_exception_handler(context)
+
+    def report(self, loop_lag, elapsed):
+        ms = lambda v: f"{v * 1000:8.1f}"
+        rows = [f"{'comando':<14}{'n':>6}{'ack p50':>10}{'ack p99':>10}{'tot p50':>10}{'tot p90':>10}{'tot p99':>10}{'tot max':>10}{'>3s':>6}"]
+        for name, totals in self.total.items():
+            acks = self.ack[name]
+            rows.append(
+                f"{name:<14}{len(totals):>6}  {ms(percentile(acks, 50))}  {ms(percentile(acks, 99))}"
+                f"  {ms(percentile(totals, 50))}  {ms(percentile(totals, 90))}  {ms(percentile(totals, 99))}"
+                f"  {ms(max(totals))}{self.missed[name]:>6}"
+            )
+        rows.append("")
+        if self.discovery:
+            rows.append(
+                f"Descoberta: {self.discovery['found']} endereços, {self.discovery['added']} servidores novos "
+                f"em {self.discovery['elapsed']:.2f} s ({self.discovery['per_second']:.0f}/s)"
+                + (" ❌ INCOMPLETA (master sem resposta)" if self.discovery["incomplete"] else "")
+            )
+        rows.append(
+            f"Lag do event loop (ms): p50={percentile(loop_lag, 50) * 1000:.1f} "
+            f"p99={percentile(loop_lag, 99) * 1000:.1f} max={max(loop_lag, default=0) * 1000:.1f}"
+        )
+        if self.http_pool:
+            pool = self.http_pool
+            rows.append(
+                f"Pool HTTP: {pool['requests']} pedidos | reutilização {pool['reuse_ratio']:.0%} "
+                f"({pool['new_connections']} ligações novas) | fila: {pool['queued']} "
+                f"(média {pool['queue_wait_avg_ms']:.1f} ms, máx {pool['queue_wait_max_ms']:.1f} ms)"
+            )
+        total_missed = sum(self.missed.values())
+        total_calls = sum(len(v) for v in self.total.values())
+        rows.append(f"Interações: {total_calls} em {elapsed:.2f} s | prazo de 3 s falhado: {total_missed}")
+        if self.abandoned_tasks:
+            rows.append(f"❌ DEFEITO NO BOT: {self.abandoned_tasks} tasks destruídas ainda pendentes (ex: {self.abandoned_example})")
+        for scenario, errors in self.errors.items():
+            rows.append(f"❌ {scenario}: {len(errors)} erros (ex: {errors[0]})")
+        return "\n".join(rows)
+
+    def as_dict(self, loop_lag, elapsed):
+        def summary(values):
+            return {p: percentile(values, p) for p in (50, 90, 99)} | {"max": max(values, default=0.0)}
+        return {
+            "elapsed": elapsed,
+            "commands": {
+                name: {"count": len(totals), "ack": summary(self.ack[name]), "total": summary(totals),
+                       "deadline_missed": self.missed[name]}
+                for name, totals in self.total.items()
+            },
+            "loop_lag": summary(loop_lag),
+            "errors": {k: len(v) for k, v in self.errors.items()},
+            "abandoned_tasks": self.abandoned_tasks,
+            "discovery": self.discovery,
+            "http_pool": self.http_pool,
+        }
+
+
+# --- Execução ---
+async def run_load(args):
+    servers, transports = await start_fake_a2s(args.discover or args.servers, args.a2s_delay, args.offline_ratio)
+    runner, base_url = await start_fake_faceit(args.faceit_delay)
+
+    # Com --discover o servers.json começa vazio e é preenchido pelo bot.discover_servers
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump([] if args.discover else servers, f)
+        servers_file = f.name
+    bot.SERVERS_FILE = servers_file
+    bot.FACEIT_API_BASE = base_url
+    bot.FACEIT_API_KEY = bot.FACEIT_API_KEY or "loadtest"
+    await bot.http_pool.start()
+
+    stats = Stats()
+    asyncio.get_running_loop().set_exception_handler(stats.loop_exception_handler)
+    if args.discover:
+        master_transport, master_address = await start_fake_master(servers)
+        transports.append(master_transport)
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            stats.discovery = await bot.discover_servers(master_address=master_address)
+    monitor = LoopLagMonitor()
+    names = [n.strip() for n in args.commands.split(",") if n.strip()]
+
+    async def one(i, arrived_at):
+        name = names[i % len(names)]
+        try:
+            await SCENARIOS[name](stats.record, arrived_at)
+        except Exception as e:
+            stats.record_error(name, e)
+
+    # Chegadas em loop aberto: o cenário i chega a start + i/rate, esteja o bot livre ou não.
+    # A hora de chegada é a agendada, por isso um driver atrasado pelo loop também conta no ack.
+    monitor.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            running = []
+            for i in range(args.requests):
+                arrived_at = start + i / args.rate
+                delay = arrived_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                running.append(asyncio.create_task(one(i, arrived_at)))
+            await asyncio.gather(*running)
+    finally:
+        elapsed = time.perf_counter() - start
+        await monitor.stop()
+        stats.http_pool = bot.http_pool.stats()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await bot.http_pool.close()
+        await runner.cleanup()
+        for transport in transports:
+            transport.close()
+        os.remove(servers_file)
+
+    return stats, monitor.samples, elapsed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test offline dos comandos do bot.")
+    parser.add_argument("--rate", type=float, default=100.0, help="Cenários que chegam por segundo (loop aberto)")
+    parser.add_argument("--requests", type=int, default=300, help="Número total de cenários a correr")
+    parser.add_argument("--commands", default="mimiajuda,checkmyelo,veademo,servidor", help="Cenários (separados por vírgula)")
+    parser.add_argument("--servers", type=int, default=20, help="Servidores A2S falsos")
+    parser.add_argument("--discover", type=int, default=0, metavar="N",
+                        help="Publica N servidores num master server falso e descobre-os antes do teste")
+    parser.add_argument("--offline-ratio", type=float, default=0.0, help="Fração de servidores que não respondem")
+    parser.add_argument("--a2s-delay", type=float, default=0.05, help="Atraso máximo da resposta A2S (s)")
+    parser.add_argument("--faceit-delay", type=float, default=0.1, help="Atraso máximo da API Faceit (s)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed do random (resultados reprodutíveis)")
+    parser.add_argument("--json", dest="json_path", default=None, help="Grava o relatório em JSON neste ficheiro")
+    parser.add_argument("--fail-on-miss", action="store_true", help="Sai com código 1 se algum prazo de 3 s falhar")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os prints do bot")
+    args = parser.parse_args(argv)
+    if args.rate <= 0:
+        parser.error("--rate tem de ser maior que 0")
+    unknown = set(n.strip() for n in args.commands.split(",") if n.strip()) - SCENARIOS.keys()
+    if unknown:
+        parser.error(f"Cenários desconhecidos: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+    stats, loop_lag, elapsed = asyncio.run(run_load(args))
+    print(stats.report(loop_lag, elapsed))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(stats.as_dict(loop_lag, elapsed), f, indent=2)
+    if args.fail_on_miss and (sum(stats.missed.values()) or stats.errors or stats.abandoned_tasks):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())